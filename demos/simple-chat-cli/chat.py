@@ -9,33 +9,62 @@ This CLI demonstrates:
 4. Token counting and usage tracking
 """
 
+import argparse
+import asyncio
+import hashlib
+import inspect
 import json
+import mmap
 import os
+import re
+import signal
+import stat as stat_mode
 import sys
+import time
+import uuid
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, Optional, List, Tuple
 
-from openai import OpenAI
-# Packages for the Chat CLI interface
-from prompt_toolkit import PromptSession
+# Packages for the Chat CLI interface. Only what module-level code needs is imported here;
+# heavier modules (openai, rich.markdown, prompt_toolkit's session, dotenv) are imported where
+# they are used so `python chat.py --help` starts quickly.
 from prompt_toolkit.completion import PathCompleter, Completer, Completion, WordCompleter
-from prompt_toolkit.formatted_text import HTML
-from prompt_toolkit.styles import Style
 from rich.console import Console
-from rich.markdown import Markdown
-from rich.panel import Panel
-from rich.text import Text
-from dotenv import load_dotenv
 
 from tools import create_file, move_file, edit_file, FILE_TOOL_DEFINITIONS
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
-# Load environment variables
-load_dotenv()
-
-# Initialize clients
+# Initialize console; the API client is created lazily by get_client()
 console = Console()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client: Optional["AsyncOpenAI"] = None
+
+
+def get_client() -> "AsyncOpenAI":
+    """Return the shared AsyncOpenAI client, creating it on first use (after main() has checked the API key)"""
+    global _client
+    if _client is not None:
+        return _client
+
+    import httpx
+    from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+    # HTTP/2 lets the tool loop's follow-up requests share one warm connection
+    # instead of paying a new TCP+TLS handshake
+    http_client = DefaultAsyncHttpxClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64, keepalive_expiry=60),
+    )
+    _client = AsyncOpenAI(
+        api_key=os.environ["OPENAI_API_KEY"],
+        http_client=http_client,
+        # Fail fast on connect; leave plenty of read time for long, non-streamed replies
+        timeout=httpx.Timeout(600.0, connect=5.0),
+    )
+    return _client
 
 
 
@@ -45,7 +74,115 @@ TOOL_HANDLERS = {
     "edit_file": edit_file,
 }
 
+# Tool arguments that name a file; calls sharing one of these must run in order
+_PATH_ARGUMENTS = ("filepath", "src", "dst")
+
+# Where the last conversation id and token totals are kept between runs
+STATE_PATH = Path("~/.config/openai-chat-cli/state.json").expanduser()
+
+# Upper bound on model round-trips per turn while the model keeps calling tools
+MAX_TOOL_ROUNDS = 5
+
+# How many attached files to keep in memory for reuse across turns
+ATTACHMENT_CACHE_SIZE = 64
+
+# Files larger than MAX_INLINE_BYTES are attached as a head + tail excerpt instead of in full
+MAX_INLINE_BYTES = 256 * 1024
+ATTACHMENT_HEAD_BYTES = 128 * 1024
+ATTACHMENT_TAIL_BYTES = 64 * 1024
+
+# Matches @path file references in user input
+_AT_REF = re.compile(r'@(\S+)')
+
+# How long (seconds) and for how many directories @ path completion reuses a listing
+DIR_LISTING_TTL = 2.0
+DIR_LISTING_CACHE_SIZE = 64
+
+# Any of these in a reply means it may need Markdown rendering
+_MARKDOWN_HINTS = ("`", "#", "*", "_", "[", ">", "|", "\n- ")
+
+# /batch mode: several prompts go out in one request and come back as one JSON array of answers
+BATCH_INSTRUCTIONS = (
+    "You will receive several independent, numbered prompts. Answer each one on its own, "
+    "in Markdown, and return the answers in the same order as the prompts."
+)
+BATCH_ANSWER_FORMAT = {
+    "type": "json_schema",
+    "name": "batch_answers",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "answers": {
+                "type": "array",
+                "items": {"type": "string"},
+                "description": "One answer per prompt, in prompt order.",
+            },
+        },
+        "required": ["answers"],
+        "additionalProperties": False,
+    },
+}
+
 # boilerplate code for the Chat CLI interface you can just copy
+class CachedPathCompleter(PathCompleter):
+    """
+    PathCompleter that reuses each directory listing for a couple of seconds,
+    so typing after @ doesn't rescan the directory on every keystroke.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        # directory -> (listed_at, [(name, is_dir), ...])
+        self._dir_cache: "OrderedDict[str, Tuple[float, List[Tuple[str, bool]]]]" = OrderedDict()
+
+    def _list_dir(self, directory: str) -> List[Tuple[str, bool]]:
+        """Return (name, is_dir) entries of directory sorted case-insensitively, cached briefly"""
+        now = time.monotonic()
+        cached = self._dir_cache.get(directory)
+        if cached is not None and now - cached[0] < DIR_LISTING_TTL:
+            self._dir_cache.move_to_end(directory)
+            return cached[1]
+
+        with os.scandir(directory) as it:
+            entries = [(entry.name, entry.is_dir()) for entry in it]
+        entries.sort(key=lambda entry: entry[0].lower())
+
+        self._dir_cache[directory] = (now, entries)
+        self._dir_cache.move_to_end(directory)
+        if len(self._dir_cache) > DIR_LISTING_CACHE_SIZE:
+            self._dir_cache.popitem(last=False)
+        return entries
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        if len(text) < self.min_input_len:
+            return
+
+        if self.expanduser:
+            text = os.path.expanduser(text)
+        directory = os.path.dirname(text) or "."
+        prefix = os.path.basename(text)
+
+        try:
+            entries = self._list_dir(directory)
+        except OSError:
+            return
+
+        for name, is_dir in entries:
+            if not name.startswith(prefix):
+                continue
+            if self.only_directories and not is_dir:
+                continue
+            if not self.file_filter(os.path.join(directory, name)):
+                continue
+            yield Completion(
+                name[len(prefix):],
+                start_position=0,
+                display=name + "/" if is_dir else name,
+            )
+
+
 class ChatCompleter(Completer):
     """
     Custom completer that handles both:
@@ -54,7 +191,7 @@ class ChatCompleter(Completer):
     """
 
     def __init__(self):
-        self.path_completer = PathCompleter(expanduser=True)
+        self.path_completer = CachedPathCompleter(expanduser=True)
 
         # Define available commands with descriptions
         self.commands = {
@@ -62,8 +199,13 @@ class ChatCompleter(Completer):
             'history': 'View full conversation history',
             'stats': 'Show token usage and session statistics',
             'new': 'Start a new conversation',
+            'resume': 'Resume a conversation by ID: /resume <id>',
+            'forget': 'Forget the saved conversation and token totals',
             'websearch': 'Toggle web search on/off',
             'tools': 'List the currently available tools',
+            'cache': 'Clear cached model responses',
+            'batch': 'Toggle batch mode (queue prompts, send them in one request)',
+            'flush': 'Send queued batch prompts now',
             'clear': 'Clear the screen',
             'exit': 'Exit the application',
             'quit': 'Exit the application',
@@ -118,26 +260,196 @@ class ChatCompleter(Completer):
                         display_meta=completion.display_meta,
                     )
 
+def _read_attachment(path: Path, size: int) -> Optional[str]:
+    """
+    Read an attached file as text while keeping memory bounded for large files.
+    Returns None if the file looks binary (NUL byte in the first 512 bytes).
+    """
+    if size <= MAX_INLINE_BYTES:
+        data = path.read_bytes()
+        if b"\0" in data[:512]:
+            return None
+        return data.decode("utf-8", errors="replace")
+
+    # Map the file instead of reading it, and only decode the slices we keep
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if b"\0" in mm[:512]:
+            return None
+        head = mm[:ATTACHMENT_HEAD_BYTES].decode("utf-8", errors="replace")
+        tail = mm[-ATTACHMENT_TAIL_BYTES:].decode("utf-8", errors="replace")
+
+    truncated = size - ATTACHMENT_HEAD_BYTES - ATTACHMENT_TAIL_BYTES
+    return f"{head}\n... [truncated {truncated:,} bytes] ...\n{tail}"
+
+
+def _tool_output_json(payload: dict) -> str:
+    """Serialize a tool result compactly (no padding whitespace, non-ASCII kept as-is) for the API"""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def _group_dependent_calls(calls: List[Any]) -> List[List[Any]]:
+    """
+    Split tool calls into groups that are safe to run concurrently.
+    Calls that touch the same path (directly or via a shared neighbour, e.g. create x,
+    move x -> y, edit y) land in one group, kept in the order the model asked for them.
+    """
+    parent = list(range(len(calls)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    first_use: Dict[str, int] = {}  # normalized path -> index of the first call touching it
+    for index, call_item in enumerate(calls):
+        try:
+            args = json.loads(call_item.arguments or "{}")
+        except ValueError:
+            continue  # Unparseable arguments fail on their own without touching any file
+        if not isinstance(args, dict):
+            continue
+        for name in _PATH_ARGUMENTS:
+            value = args.get(name)
+            if not isinstance(value, str):
+                continue
+            path = os.path.abspath(os.path.expanduser(value))
+            if path in first_use:
+                parent[find(index)] = find(first_use[path])
+            else:
+                first_use[path] = index
+
+    groups: Dict[int, List[Any]] = {}
+    for index, call_item in enumerate(calls):
+        groups.setdefault(find(index), []).append(call_item)
+    return list(groups.values())
+
+
+# (resolved path, mtime_ns, size) -> attachment text (None for binary files), least recently used first
+_FILE_CACHE: "OrderedDict[Tuple[str, int, int], Optional[str]]" = OrderedDict()
+
+
+def _cached_attachment_text(path: Path, stat: os.stat_result) -> Optional[str]:
+    """Return the attachment text for a resolved path, reading the file only if it changed since last time"""
+    key = (str(path), stat.st_mtime_ns, stat.st_size)
+    if key in _FILE_CACHE:
+        _FILE_CACHE.move_to_end(key)
+        return _FILE_CACHE[key]
+
+    content = _read_attachment(path, stat.st_size)
+    _FILE_CACHE[key] = content
+    if len(_FILE_CACHE) > ATTACHMENT_CACHE_SIZE:
+        _FILE_CACHE.popitem(last=False)
+    return content
+
+
+def _state_count(value: Any) -> int:
+    """Return a saved token count, or 0 if it isn't an int (bools are ints in Python, so exclude them)"""
+    return value if isinstance(value, int) and not isinstance(value, bool) else 0
+
+
+def _looks_like_markdown(text: str) -> bool:
+    """Cheap check for Markdown syntax, so short plain replies can skip the Markdown parser"""
+    return any(hint in text for hint in _MARKDOWN_HINTS)
+
+
+def _print_reply(text: str):
+    """Print an assistant reply, rendering it as Markdown only when it contains Markdown"""
+    if _looks_like_markdown(text):
+        from rich.markdown import Markdown
+
+        console.print(Markdown(text))
+    else:
+        console.print(text, markup=False, highlight=False)
+
+
+# Returned by the prompt instead of user input when the batch window ends it
+_FLUSH_BATCH = object()
+
+
+class PromptBuffer:
+    """
+    Collects prompts entered in /batch mode so they can be sent together.
+    The main loop flushes it once the input line has been empty and untouched for `window` seconds.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.prompts: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.prompts)
+
+    def add(self, prompt: str):
+        self.prompts.append(prompt)
+
+    def drain(self) -> List[str]:
+        """Return the queued prompts and empty the buffer"""
+        prompts, self.prompts = self.prompts, []
+        return prompts
+
+
 # This is the main class that manages the chat session
 class ChatSession:
     """Manages a chat session using OpenAI's APIs"""
 
-    def __init__(self, model: str = "gpt-5.2"):
+    def __init__(self, model: str = "gpt-5.2", stream: bool = True, batch_window: float = 0.25):
         self.model = model
+        self.stream = stream  # Print tokens as they arrive instead of rendering the full reply
+        self.batch_mode = False  # Queue prompts and send them together (see /batch)
+        self.prompt_buffer = PromptBuffer(batch_window)
         self.conversation_id: Optional[str] = None
         self.total_input_tokens = 0
         self.total_output_tokens = 0
         self.message_count = 0
         self.web_search_enabled = True  # Enable web search tool by default
+        # resolved path -> "attachment_N"; stays fixed for the session so file blocks keep the same bytes
+        self._attachment_ids: Dict[str, str] = {}
+        # Replies to identical, tool-free turns, keyed by _cache_key()
+        self._response_cache: Dict[str, Any] = {}
+        # Hash chain of the turns in the current conversation: "" for a freshly created one,
+        # the previous turn's cache key after each clean turn, and a random value whenever
+        # the server-side content is unknown (resumed conversations, tool-using turns)
+        self._conversation_prefix = uuid.uuid4().hex
+        # Both tool payload variants are built once; the SDK only reads them
+        self._tools_no_web: Tuple[dict, ...] = tuple(FILE_TOOL_DEFINITIONS)
+        self._tools_with_web: Tuple[dict, ...] = self._tools_no_web + ({"type": "web_search"},)
+        # Pick up the previous run's conversation so its server-side cache can be reused
+        self._load_state()
+
+    def _load_state(self):
+        """Restore the conversation id and token totals saved by a previous run"""
+        try:
+            state = json.loads(STATE_PATH.read_text())
+        except (OSError, ValueError):
+            return
+        if not isinstance(state, dict):
+            # Anything but an object means the file isn't ours; treat it as no saved state
+            return
+        # Hand-edited or foreign values of the wrong type fall back to a fresh start
+        conversation_id = state.get("conversation_id")
+        self.conversation_id = conversation_id if isinstance(conversation_id, str) else None
+        self.total_input_tokens = _state_count(state.get("total_input_tokens"))
+        self.total_output_tokens = _state_count(state.get("total_output_tokens"))
+
+    def _save_state(self):
+        """Persist the conversation id and token totals for the next run"""
+        state = {
+            "conversation_id": self.conversation_id,
+            "total_input_tokens": self.total_input_tokens,
+            "total_output_tokens": self.total_output_tokens,
+        }
+        try:
+            STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            STATE_PATH.write_text(json.dumps(state))
+        except OSError as e:
+            console.print(f"[dim]Could not save session state: {e}[/dim]")
 
-    def _build_tool_payload(self) -> List[dict]:
-        """Return the list of tool definitions to offer the model."""
-        tools = list(FILE_TOOL_DEFINITIONS)
-        if self.web_search_enabled:
-            tools.append({"type": "web_search"})
-        return tools
+    def _build_tool_payload(self) -> Tuple[dict, ...]:
+        """Return the tool definitions to offer the model."""
+        return self._tools_with_web if self.web_search_enabled else self._tools_no_web
 
-    def _execute_tool_call(self, call_item):
+    async def _execute_tool_call(self, call_item):
         """Invoke a local Python function for the tool call and format output for the API."""
         handler = TOOL_HANDLERS.get(call_item.name)
         if handler is None:
@@ -146,7 +458,7 @@ class ChatSession:
             return {
                 "type": "function_call_output",
                 "call_id": call_item.call_id,
-                "output": json.dumps({"error": message}),
+                "output": _tool_output_json({"error": message}),
             }
 
         try:
@@ -159,12 +471,13 @@ class ChatSession:
             return {
                 "type": "function_call_output",
                 "call_id": call_item.call_id,
-                "output": json.dumps({"error": error_msg}),
+                "output": _tool_output_json({"error": error_msg}),
             }
 
         try:
             console.print(f"[dim]→ Executing tool {call_item.name} with args {args}[/dim]")
-            result = handler(**args)
+            # Handlers do blocking file I/O, so run them off the event loop
+            result = await asyncio.to_thread(handler, **args)
         except Exception as exc:
             result = f"Tool {call_item.name} raised an error: {exc}"
             console.print(f"[red]{result}[/red]")
@@ -172,10 +485,48 @@ class ChatSession:
         return {
             "type": "function_call_output",
             "call_id": call_item.call_id,
-            "output": json.dumps({"result": result}),
+            "output": _tool_output_json({"result": result}),
+        }
+
+    async def _execute_tool_calls_in_order(self, calls: List[Any]) -> List[dict]:
+        """Execute dependent tool calls sequentially, in the order given"""
+        return [await self._execute_tool_call(call_item) for call_item in calls]
+
+    def _cache_key(self, input_items: List[dict], tools: Tuple[dict, ...]) -> str:
+        """Hash everything that determines the model's reply into a compact cache key"""
+        payload = {
+            "model": self.model,
+            "prefix": self._conversation_prefix,
+            "input": input_items,
+            "tools": tools,
+            "web_search": self.web_search_enabled,
         }
+        encoded = json.dumps(payload, sort_keys=True).encode()
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
 
-    def _call_model_with_tools(self, input_items: List[dict], conversation_id: Optional[str] = None):
+    async def _record_cached_turn(self, input_items: List[dict], cached, conversation_id: Optional[str]) -> bool:
+        """Append a replayed turn to the server-side conversation so history and later context include it"""
+        if not conversation_id:
+            return True
+        try:
+            await get_client().conversations.items.create(
+                conversation_id,
+                items=input_items + [{"role": "assistant", "content": cached.output_text}],
+            )
+        except Exception as e:
+            console.print(f"[dim]Could not record the cached reply in the conversation ({e}); calling the model instead[/dim]")
+            return False
+        return True
+
+    async def _stream_response(self, request_kwargs: dict):
+        """Stream a Responses call, printing text deltas as they arrive, and return the final response"""
+        async with get_client().responses.stream(**request_kwargs) as stream:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    console.print(event.delta, end="", markup=False, highlight=False, soft_wrap=True)
+            return await stream.get_final_response()
+
+    async def _call_model_with_tools(self, input_items: List[dict], conversation_id: Optional[str] = None):
         """
         Call the Responses API and automatically satisfy function calls by executing local tools.
         Returns the final response once the model emits a standard message.
@@ -183,104 +534,212 @@ class ChatSession:
         include = ["web_search_call.action.sources"] if self.web_search_enabled else None
         tools = self._build_tool_payload()
 
+        # The same input after the same conversation history gets the same reply, so skip the
+        # model on a hit (the turn is still recorded in the conversation)
+        cache_key = self._cache_key(input_items, tools)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None and await self._record_cached_turn(input_items, cached, conversation_id):
+            console.print("[dim]Reusing cached response (clear with /cache)[/dim]")
+            if self.stream:
+                console.print(cached.output_text, end="", markup=False, highlight=False, soft_wrap=True)
+            self._conversation_prefix = cache_key
+            return cached
+
+        # Until this turn completes cleanly the conversation's content is unknown
+        self._conversation_prefix = uuid.uuid4().hex
+
         last_response = None
-        for _ in range(5):  # Prevent infinite loops
+        ran_tools = False
+        seen_calls = set()  # (name, arguments) of every tool call already run this turn
+        final_round = False  # Set once the model repeats a call; the next reply must be text
+        for _ in range(MAX_TOOL_ROUNDS):  # Prevent infinite loops
             request_kwargs = {
                 "model": self.model,
                 "input": input_items,
-                "tools": tools if tools else None,
-                "include": include,
             }
+            if tools:
+                request_kwargs["tools"] = tools
+            if include:
+                request_kwargs["include"] = include
             if conversation_id:
                 request_kwargs["conversation"] = conversation_id
+            if final_round:
+                request_kwargs["tool_choice"] = "none"
 
-            last_response = client.responses.create(**request_kwargs)
+            if self.stream:
+                last_response = await self._stream_response(request_kwargs)
+            else:
+                last_response = await get_client().responses.create(**request_kwargs)
 
-            tool_calls = [
-                item for item in last_response.output
-                if getattr(item, "type", "") == "function_call"
-            ]
+            # Keep the model's outputs in the running list and pick out tool calls in one pass
+            tool_calls = []
+            for item in last_response.output:
+                input_items.append(item)
+                if item.type == "function_call":
+                    tool_calls.append(item)
 
             if not tool_calls:
+                # Tool calls have side effects, so only plain replies are safe to replay
+                if not ran_tools:
+                    self._response_cache[cache_key] = SimpleNamespace(
+                        output_text=last_response.output_text,
+                        output=last_response.output,
+                        usage=None,  # Replayed replies cost no tokens
+                    )
+                    self._conversation_prefix = cache_key
                 break
 
-            # Keep the model's outputs in the running list before adding tool results
-            input_items += last_response.output
+            if final_round:
+                break
+
+            ran_tools = True
 
+            # A call identical to one already run can't tell the model anything new
+            new_calls = []
             for call_item in tool_calls:
-                tool_output = self._execute_tool_call(call_item)
-                input_items.append(tool_output)
+                signature = (call_item.name, call_item.arguments)
+                if signature in seen_calls:
+                    console.print(f"[yellow]Skipping repeated call to {call_item.name}[/yellow]")
+                    input_items.append({
+                        "type": "function_call_output",
+                        "call_id": call_item.call_id,
+                        "output": _tool_output_json({
+                            "error": f"{call_item.name} was already called with these arguments; use the earlier result."
+                        }),
+                    })
+                    final_round = True
+                else:
+                    seen_calls.add(signature)
+                    new_calls.append(call_item)
+
+            # Independent tool calls run concurrently; calls on the same file run one after another
+            grouped_outputs = await asyncio.gather(
+                *(self._execute_tool_calls_in_order(group) for group in _group_dependent_calls(new_calls))
+            )
+            input_items.extend(output for outputs in grouped_outputs for output in outputs)
+
+            if final_round:
+                console.print("[yellow]The model repeated a tool call; asking it to answer now.[/yellow]")
         else:
-            console.print("[yellow]Stopping tool loop after 5 iterations to avoid infinite cycle.[/yellow]")
+            console.print(f"[yellow]Stopping tool loop after {MAX_TOOL_ROUNDS} iterations to avoid infinite cycle.[/yellow]")
 
         return last_response
 
-    def read_file_references(self, text: str) -> str:
+    def _attachment_item(self, path: Path, stat: os.stat_result, anchor: str) -> Optional[dict]:
         """
-        Find @file.txt references in the text and replace with file contents
-        This demonstrates how to prepare context for the model
+        Build the message item for an attached file.
+        Returns None for binary files.
         """
-        import re
+        content = _cached_attachment_text(path, stat)
+        if content is None:
+            return None
+        return {
+            "role": "user",
+            "content": [{"type": "input_text", "text": f"<file path='{path}' id='{anchor}'>{content}</file>"}],
+        }
 
-        # Find all @path references
-        pattern = r'@([^\s]+)'
-        matches = re.finditer(pattern, text)
+    def read_file_references(self, text: str) -> Tuple[str, List[dict]]:
+        """
+        Find @file.txt references in the text and attach each file as its own message item.
+        A file is attached once per message; later references to it become "[see attachment_N]".
+        Attachments are sorted by path, so the same set of files always produces the same
+        request prefix (and hits the prompt cache).
+        """
+        attachments: Dict[str, dict] = {}  # resolved path -> message item
+        checked: Dict[str, Optional[Path]] = {}  # reference -> resolved path, or None if not attachable
 
-        result = text
-        for match in matches:
-            filepath = match.group(1)
+        def resolve(filepath: str) -> Optional[Path]:
+            """Resolve and attach a reference, warning if it can't be attached"""
             try:
                 path = Path(filepath).expanduser()
-                if path.exists() and path.is_file():
-                    with open(path, 'r') as f:
-                        content = f.read()
-                    # Replace @filepath with the file content
-                    result = result.replace(
-                        match.group(0),
-                        f"\n--- Content from {filepath} ---\n{content}\n--- End of {filepath} ---\n"
-                    )
-                    console.print(f"[dim]Attached: {filepath}[/dim]")
-                else:
+                # One stat() answers "exists?", "regular file?" and feeds the attachment cache key
+                try:
+                    stat = path.stat()
+                except (FileNotFoundError, NotADirectoryError):
+                    stat = None
+                if stat is None or not stat_mode.S_ISREG(stat.st_mode):
                     console.print(f"[yellow]Warning: {filepath} not found[/yellow]")
+                    return None
+
+                path = path.resolve()
+                if str(path) in attachments:
+                    return path
+
+                # Only files that actually get attached claim an id, so the numbering has no gaps
+                anchor = self._attachment_ids.get(str(path), f"attachment_{len(self._attachment_ids) + 1}")
+                item = self._attachment_item(path, stat, anchor)
+                if item is None:
+                    console.print(f"[yellow]Warning: {filepath} looks like a binary file, not attached[/yellow]")
+                    return None
+                self._attachment_ids[str(path)] = anchor
+                attachments[str(path)] = item
+                console.print(f"[dim]Attached: {filepath}[/dim]")
+                return path
             except Exception as e:
                 console.print(f"[red]Error reading {filepath}: {e}[/red]")
+                return None
 
-        return result
+        seen = set()  # resolved paths already referenced earlier in this text
 
-    def send_message_chat_agent(self, user_input: str):
+        def expand(match: "re.Match") -> str:
+            filepath = match.group(1)
+            if filepath not in checked:
+                checked[filepath] = resolve(filepath)
+            path = checked[filepath]
+            if path is None:
+                return match.group(0)
+            if path in seen:
+                return f"[see {self._attachment_ids[str(path)]}]"
+            seen.add(path)
+            return match.group(0)
+
+        # Single left-to-right pass: first mentions stay as typed, repeats become back-references
+        clean_text = _AT_REF.sub(expand, text)
+        return clean_text, [attachments[path] for path in sorted(attachments)]
+
+    async def send_message_chat_agent(self, user_input: str):
         """
         Send a message using the Conversations API (stateful chat-agent mode)
         """
         try:
             # Process file references
-            processed_input = self.read_file_references(user_input)
+            clean_text, attachment_items = self.read_file_references(user_input)
 
             # Create conversation if it doesn't exist
             if not self.conversation_id:
                 console.print("\n[bold cyan]Creating new conversation...[/bold cyan]")
-                conversation = client.conversations.create(
+                conversation = await get_client().conversations.create(
                     metadata={"session": "chat-cli", "model": self.model}
                 )
                 self.conversation_id = conversation.id
+                self._conversation_prefix = ""  # Nothing in it yet
+                self._save_state()
                 console.print(f"[dim]Conversation ID: {self.conversation_id}[/dim]")
 
             console.print("\n[bold cyan]Using Chat Agent (stateful)[/bold cyan]")
             if self.web_search_enabled:
                 console.print("[dim]Web search: enabled[/dim]")
 
-            input_payload = [{"role": "user", "content": processed_input}]
-            response = self._call_model_with_tools(
+            input_payload = attachment_items + [{"role": "user", "content": clean_text}]
+            if self.stream:
+                console.print("\n[bold green]Assistant:[/bold green]")
+            response = await self._call_model_with_tools(
                 input_payload,
                 conversation_id=self.conversation_id,
             )
 
-            # Display web search sources if used
-            self._display_web_search_sources(response)
+            if self.stream:
+                # The reply was printed token by token; just finish the line
+                console.print()
+                self._display_web_search_sources(response)
+            else:
+                # Display web search sources if used
+                self._display_web_search_sources(response)
 
-            # Extract and display the response
-            assistant_message = self._extract_response_text(response)
-            console.print(f"\n[bold green]Assistant:[/bold green]")
-            console.print(Markdown(assistant_message))
+                # Extract and display the response
+                assistant_message = self._extract_response_text(response)
+                console.print("\n[bold green]Assistant:[/bold green]")
+                _print_reply(assistant_message)
 
             # Update usage statistics
             if response.usage:
@@ -291,6 +750,64 @@ class ChatSession:
         except Exception as e:
             console.print(f"[bold red]Error:[/bold red] {e}")
 
+    async def send_batch(self, prompts: List[str]):
+        """
+        Send several prompts in a single stateless Responses request and print each answer.
+        Tools, web search and the conversation are left out so every prompt maps to one answer.
+        """
+        if not prompts:
+            return
+
+        console.print(f"\n[bold cyan]Sending {len(prompts)} batched prompt(s) in one request...[/bold cyan]")
+        try:
+            input_items = []
+            for i, prompt in enumerate(prompts, 1):
+                clean_text, attachment_items = self.read_file_references(prompt)
+                input_items += attachment_items
+                input_items.append({"role": "user", "content": f"Prompt {i}: {clean_text}"})
+
+            response = await get_client().responses.create(
+                model=self.model,
+                instructions=BATCH_INSTRUCTIONS,
+                input=input_items,
+                text={"format": BATCH_ANSWER_FORMAT},
+            )
+            answers = json.loads(response.output_text)["answers"]
+
+            for i, prompt in enumerate(prompts):
+                answer = answers[i] if i < len(answers) else "_No answer returned for this prompt._"
+                console.print(f"\n[bold blue]Prompt {i + 1}:[/bold blue]")
+                console.print(prompt, markup=False, highlight=False)
+                console.print("[bold green]Assistant:[/bold green]")
+                _print_reply(answer)
+
+            if response.usage:
+                self._update_stats(response.usage)
+
+            self.message_count += len(prompts)
+
+        except Exception as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+
+    async def flush_batch(self):
+        """Send whatever is queued in the prompt buffer"""
+        if not self.prompt_buffer:
+            console.print("[dim]No queued prompts to send[/dim]")
+            return
+        await self.send_batch(self.prompt_buffer.drain())
+
+    async def toggle_batch_mode(self):
+        """Switch batch mode on/off, sending any queued prompts when leaving it"""
+        self.batch_mode = not self.batch_mode
+        if self.batch_mode:
+            console.print("[green]✓ Batch mode enabled[/green]")
+            console.print("[dim]Prompts are queued and sent together without tools or conversation history. "
+                          "Use /flush to send now, /batch to leave.[/dim]")
+        else:
+            if self.prompt_buffer:
+                await self.send_batch(self.prompt_buffer.drain())
+            console.print("[green]✓ Batch mode disabled[/green]")
+
     def _extract_response_text(self, response) -> str:
         """Extract text content from a response object"""
         if hasattr(response, 'output_text') and response.output_text:
@@ -308,27 +825,36 @@ class ChatSession:
         """Update token usage statistics"""
         self.total_input_tokens += usage.input_tokens
         self.total_output_tokens += usage.output_tokens
+        self._save_state()
 
     def _display_web_search_sources(self, response):
         """Display web search sources if the model used web search"""
+        from rich.text import Text
+
         try:
+            # Collect everything into one Text so it is rendered and written in a single print
+            sources_text = Text()
             for item in response.output:
                 if item.type == "web_search_call":
                     # Model decided to use web search
                     if hasattr(item, 'action') and hasattr(item.action, 'sources'):
-                        console.print("\n[bold magenta]🔍 Web Sources Used:[/bold magenta]")
+                        sources_text.append("\n🔍 Web Sources Used:\n", style="bold magenta")
                         for i, source in enumerate(item.action.sources, 1):
                             title = source.get('title', 'Untitled')
                             url = source.get('url', '')
-                            console.print(f"  {i}. {title}")
-                            console.print(f"     [dim]{url}[/dim]")
-                        console.print()
+                            sources_text.append(f"  {i}. {title}\n")
+                            sources_text.append(f"     {url}\n", style="dim")
+            if sources_text.plain:
+                console.print(sources_text)
         except Exception:
             # Silently ignore if we can't extract sources
             pass
 
     def show_stats(self):
         """Display session statistics"""
+        from rich.panel import Panel
+        from rich.text import Text
+
         total_tokens = self.total_input_tokens + self.total_output_tokens
 
         stats_text = Text()
@@ -346,6 +872,8 @@ class ChatSession:
 
     def show_tools(self):
         """Display the currently available tools and their status."""
+        from rich.markdown import Markdown
+
         lines = [
             "# Available Tools",
             "",
@@ -366,44 +894,94 @@ class ChatSession:
 
         console.print(Markdown("\n".join(lines)))
 
-    def show_conversation_history(self):
+    async def show_conversation_history(self):
         """Display the full chat history for the active session"""
+        from rich.console import Group
+        from rich.text import Text
+
         if not self.conversation_id:
             console.print("[yellow]No conversation active yet. Send a message to start chatting.[/yellow]")
             return
 
         try:
-            # List all items in the conversation
-            items = client.conversations.items.list(
+            console.print(f"\n[bold cyan]Conversation History ({self.conversation_id})[/bold cyan]\n")
+
+            # Fetch small pages so the first messages render while later ones load
+            first_page = await get_client().conversations.items.list(
                 self.conversation_id,
-                limit=100,
+                limit=25,
                 order="asc"
             )
 
-            console.print(f"\n[bold cyan]Conversation History ({self.conversation_id})[/bold cyan]\n")
+            async for page in first_page.iter_pages():
+                # Build each page as one renderable and print it in a single call
+                parts = []
+                for item in page.data:
+                    if item.type == "message":
+                        role = item.role.capitalize()
+                        role_color = "green" if item.role == "assistant" else "blue"
 
-            for item in items.data:
-                if item.type == "message":
-                    role = item.role.capitalize()
-                    role_color = "green" if item.role == "assistant" else "blue"
+                        parts.append(Text(f"{role}:", style=f"bold {role_color}"))
 
-                    console.print(f"[bold {role_color}]{role}:[/bold {role_color}]")
+                        for content in item.content:
+                            if hasattr(content, 'text'):
+                                parts.append(Text(f"  {content.text}\n"))
 
-                    for content in item.content:
-                        if hasattr(content, 'text'):
-                            console.print(f"  {content.text}\n")
+                if parts:
+                    console.print(Group(*parts))
 
         except Exception as e:
             console.print(f"[bold red]Error:[/bold red] {e}")
 
+    def clear_response_cache(self):
+        """Drop all cached model responses"""
+        count = len(self._response_cache)
+        self._response_cache.clear()
+        console.print(f"[green]✓ Cleared {count} cached response(s)[/green]")
+
     def new_conversation(self):
         """Start a new conversation"""
         self.conversation_id = None
         self.message_count = 0
+        self._save_state()
         console.print("[green]✓ Started new chat session[/green]")
 
+    async def resume_conversation(self, conversation_id: str):
+        """Attach to an existing conversation by ID"""
+        if not conversation_id:
+            console.print("[yellow]Usage: /resume <conversation_id>[/yellow]")
+            return
+
+        try:
+            # Make sure the conversation exists before switching to it
+            await get_client().conversations.retrieve(conversation_id)
+        except Exception as e:
+            console.print(f"[bold red]Error:[/bold red] {e}")
+            return
+
+        self.conversation_id = conversation_id
+        self._conversation_prefix = uuid.uuid4().hex  # Its earlier turns are unknown here
+        self.message_count = 0
+        self._save_state()
+        console.print(f"[green]✓ Resumed conversation {conversation_id}[/green]")
+
+    def forget_state(self):
+        """Start fresh and delete the saved conversation ID, token totals and cached replies"""
+        self.conversation_id = None
+        self.message_count = 0
+        self.total_input_tokens = 0
+        self.total_output_tokens = 0
+        self._response_cache.clear()
+        try:
+            STATE_PATH.unlink()
+        except FileNotFoundError:
+            pass
+        console.print("[green]✓ Forgot saved conversation and token totals[/green]")
+
 def show_welcome():
     """Display welcome message"""
+    from rich.markdown import Markdown
+
     welcome = """
 # Welcome to the Simple Chat Agent! 🤖
 
@@ -415,12 +993,15 @@ This CLI keeps a single chat experience built on OpenAI's Conversations API. Eve
 - `/stats` - Show session statistics
 - `/websearch` - Toggle web search on/off (enabled by default)
 - `/tools` - Display available tools and their status
+- `/cache` - Clear cached responses
+- `/batch` - Toggle batch mode; `/flush` sends queued prompts
 - `/new` - Start a fresh chat session
+- `/resume <id>` - Continue an earlier conversation; `/forget` clears the saved one
 - `/clear` - Clear screen
 - `/exit` - Exit the chat
 
 ## Attach Files with @
-Reference files inline (e.g., "Summarize @README.md"). The CLI will inline their contents before sending the request.
+Reference files inline (e.g., "Summarize @README.md"). The CLI attaches their contents as separate messages alongside your text.
 
 ## Tips:
 - Press TAB after typing `/` to see available commands
@@ -435,6 +1016,8 @@ Type your first message below to spin up the chat agent!
 
 def show_help():
     """Display help message"""
+    from rich.markdown import Markdown
+
     help_text = """
 # Chat CLI Help
 
@@ -444,7 +1027,12 @@ def show_help():
 - `/stats` - Show token usage and session stats
 - `/websearch` - Toggle web search on/off
 - `/tools` - List available tools and current web search status
+- `/cache` - Clear cached model responses
+- `/batch` - Toggle batch mode (queue prompts and send them in one request)
+- `/flush` - Send queued batch prompts immediately
 - `/new` - Start a new conversation
+- `/resume <id>` - Resume an existing conversation by ID
+- `/forget` - Forget the saved conversation and token totals
 - `/clear` - Clear the screen
 - `/exit` or `/quit` - Exit the application
 
@@ -458,6 +1046,13 @@ The model can search the web automatically when it needs current information!
 
 **Example:** "What are the latest features in Python 3.13?"
 
+## Batch Mode:
+
+Use `/batch` when pasting or scripting many independent prompts.
+- Prompts are queued and sent together in a single request once the input line stays empty briefly
+- Each prompt gets its own answer; tools, web search and conversation history are not used
+- `/flush` sends the queue immediately, `/batch` again leaves batch mode
+
 ## Tools & Automations:
 
 Use `/tools` to see which helper functions the assistant can call.
@@ -478,6 +1073,7 @@ You can include file contents in your prompts using `@`:
 ## Chat Agent Mode:
 - Built on Conversations API for automatic context
 - All messages stay in a single ongoing chat unless you run `/new`
+- The conversation is picked up again the next time you start the CLI (`/forget` to opt out)
 - Tool outputs are automatically fed back to the model
 
 ## Tips:
@@ -485,23 +1081,55 @@ You can include file contents in your prompts using `@`:
 - Tab completion works for file paths after @
 - Token usage is tracked and displayed with /stats
 - Conversation IDs are displayed whenever a chat session is active
+- An identical prompt after identical history (e.g. the first message after `/new`) replays the cached reply; tool-using turns are never cached
 """
     console.print(Markdown(help_text))
 
 
-def main():
+def _toggle_websearch(session: ChatSession, argument: str):
+    """Turn the web search tool on or off"""
+    session.web_search_enabled = not session.web_search_enabled
+    status = "enabled" if session.web_search_enabled else "disabled"
+    console.print(f"[green]✓ Web search {status}[/green]")
+
+
+def _clear_screen(session: ChatSession, argument: str):
+    """Clear the terminal and show the welcome message again"""
+    console.clear()
+    show_welcome()
+
+
+# Slash commands (other than /exit and /quit): name -> handler(session, argument).
+# Handlers for async session methods return a coroutine, which the main loop awaits.
+COMMAND_HANDLERS = {
+    'help': lambda session, argument: show_help(),
+    'history': lambda session, argument: session.show_conversation_history(),
+    'stats': lambda session, argument: session.show_stats(),
+    'new': lambda session, argument: session.new_conversation(),
+    'resume': lambda session, argument: session.resume_conversation(argument),
+    'forget': lambda session, argument: session.forget_state(),
+    'websearch': _toggle_websearch,
+    'tools': lambda session, argument: session.show_tools(),
+    'cache': lambda session, argument: session.clear_response_cache(),
+    'batch': lambda session, argument: session.toggle_batch_mode(),
+    'flush': lambda session, argument: session.flush_batch(),
+    'clear': _clear_screen,
+}
+
+
+async def main_async(args: argparse.Namespace):
     """Main chat loop"""
-    # Verify API key
-    if not os.getenv("OPENAI_API_KEY"):
-        console.print("[bold red]Error:[/bold red] OPENAI_API_KEY not found in environment")
-        console.print("Please set your API key in .env file or environment variables")
-        sys.exit(1)
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.formatted_text import HTML
+    from prompt_toolkit.styles import Style
 
     # Show welcome message
     show_welcome()
 
     # Create chat session
-    session = ChatSession()
+    session = ChatSession(stream=not args.no_stream, batch_window=args.batch_window / 1000)
+    if session.conversation_id:
+        console.print(f"[dim]Resuming conversation {session.conversation_id} (use /new to start fresh)[/dim]")
 
     # Setup prompt toolkit with custom style and completer
     style = Style.from_dict({
@@ -513,63 +1141,99 @@ def main():
         style=style,
     )
 
+    # Batch window timer: every keystroke restarts it, and it only ends the prompt while the
+    # input line is empty, so nothing being typed is ever thrown away
+    loop = asyncio.get_running_loop()
+    flush_timer: Optional[asyncio.TimerHandle] = None
+
+    def arm_flush_timer(_=None):
+        nonlocal flush_timer
+        if flush_timer is not None:
+            flush_timer.cancel()
+            flush_timer = None
+        if session.prompt_buffer:
+            flush_timer = loop.call_later(session.prompt_buffer.window, flush_when_idle)
+
+    def flush_when_idle():
+        if not prompt_session.app.is_running:
+            # Busy with a command; try again once the prompt is back
+            arm_flush_timer()
+        elif not prompt_session.default_buffer.text:
+            prompt_session.app.exit(result=_FLUSH_BATCH)
+
+    prompt_session.default_buffer.on_text_changed += arm_flush_timer
+
+    async def run_interruptible(work):
+        """Run one turn or command as its own task so Ctrl-C cancels just that task, not the CLI"""
+        task = asyncio.ensure_future(work)
+        try:
+            loop.add_signal_handler(signal.SIGINT, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass  # No loop signal handlers on this platform (e.g. Windows); Ctrl-C keeps its default behaviour
+        try:
+            await task
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                raise
+            console.print("\n[yellow]Use /exit to quit[/yellow]")
+        finally:
+            try:
+                loop.remove_signal_handler(signal.SIGINT)
+            except (NotImplementedError, RuntimeError):
+                pass
+
     # Main chat loop
     while True:
         try:
             # Get user input with nice prompt
-            user_input = prompt_session.prompt(
-                HTML('<prompt>[chat-agent]> </prompt>')
-            ).strip()
+            label = '[batch]> ' if session.batch_mode else '[chat-agent]> '
+            arm_flush_timer()
+            user_input = await prompt_session.prompt_async(HTML(f'<prompt>{label}</prompt>'))
+            if user_input is _FLUSH_BATCH:
+                await run_interruptible(session.flush_batch())
+                continue
+            user_input = user_input.strip()
 
             if not user_input:
                 continue
 
             # Handle commands
             if user_input.startswith('/'):
-                command = user_input[1:].split(maxsplit=1)[0].lower()
+                command, _, argument = user_input[1:].partition(' ')
+                command = command.lower()
+                argument = argument.strip()
 
-                if command in ['exit', 'quit']:
+                if command in ('exit', 'quit'):
+                    if session.prompt_buffer:
+                        await session.flush_batch()
                     console.print("\n[cyan]Goodbye! 👋[/cyan]")
                     break
 
-                elif command == 'help':
-                    show_help()
-
-                elif command == 'history':
-                    session.show_conversation_history()
-
-                elif command == 'stats':
-                    session.show_stats()
-
-                elif command == 'new':
-                    session.new_conversation()
-
-                elif command == 'websearch':
-                    session.web_search_enabled = not session.web_search_enabled
-                    status = "enabled" if session.web_search_enabled else "disabled"
-                    console.print(f"[green]✓ Web search {status}[/green]")
-
-                elif command == 'tools':
-                    session.show_tools()
-
-                elif command == 'clear':
-                    console.clear()
-                    show_welcome()
-
-                else:
+                handler = COMMAND_HANDLERS.get(command)
+                if handler is None:
                     console.print(f"[red]Unknown command: {command}[/red]")
                     console.print("[dim]Type /help for available commands[/dim]")
+                else:
+                    result = handler(session, argument)
+                    if inspect.isawaitable(result):
+                        await run_interruptible(result)
+
+                continue
 
+            if session.batch_mode:
+                session.prompt_buffer.add(user_input)
                 continue
 
             # Send message using the chat agent
-            session.send_message_chat_agent(user_input)
+            await run_interruptible(session.send_message_chat_agent(user_input))
 
         except KeyboardInterrupt:
             console.print("\n[yellow]Use /exit to quit[/yellow]")
             continue
 
         except EOFError:
+            if session.prompt_buffer:
+                await session.flush_batch()
             console.print("\n[cyan]Goodbye! 👋[/cyan]")
             break
 
@@ -577,5 +1241,49 @@ def main():
             console.print(f"[bold red]Unexpected error:[/bold red] {e}")
 
 
+def _positive_int(value: str) -> int:
+    """argparse type for options that must be a whole number above zero"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {number}")
+    return number
+
+
+def main():
+    """Entry point: verify configuration and run the async chat loop"""
+    parser = argparse.ArgumentParser(
+        description="Simple chat agent built on OpenAI's Conversations and Responses APIs"
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Wait for the full reply and render it as Markdown instead of streaming tokens",
+    )
+    parser.add_argument(
+        "--batch-window",
+        type=_positive_int,
+        default=250,
+        metavar="MS",
+        help="In /batch mode, send queued prompts after this many milliseconds with an empty, idle input line (default: 250)",
+    )
+    args = parser.parse_args()
+
+    # Load environment variables
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    # Verify API key
+    if not os.getenv("OPENAI_API_KEY"):
+        console.print("[bold red]Error:[/bold red] OPENAI_API_KEY not found in environment")
+        console.print("Please set your API key in .env file or environment variables")
+        sys.exit(1)
+
+    asyncio.run(main_async(args))
+
+
 if __name__ == "__main__":
     main()